@@ -6,6 +6,7 @@ import (
 	"bufio"
 	"encoding/json"
 	"fmt"
+	"io"
 	"log"
 	"net"
 	"strconv"
@@ -109,9 +110,10 @@ func (s *RedisServer) readCommand(reader *bufio.Reader) ([]string, error) {
 				return nil, err
 			}
 
-			// Read bulk string content
+			// Read bulk string content - Read may return less than length
+			// when the value spans the buffer boundary, so read it in full
 			buf := make([]byte, length)
-			if _, err := reader.Read(buf); err != nil {
+			if _, err := io.ReadFull(reader, buf); err != nil {
 				return nil, err
 			}
 
@@ -2,36 +2,19 @@
 Curator Agent - Formats and adds knowledge to base Hippocampus store
 Ensures information is structured properly for all users
 """
-import json
-import requests
-from datetime import datetime
+import atexit
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
 
-try:
-    from agent import HippocampusClient
-except ImportError:
-    HippocampusClient = None
+from agent import HippocampusClient, ResponseCache, CircuitBreaker, loads_json, ollama_session, post_ollama_chat
 
 
-class CuratorAgent:
-    """Agent that curates and adds knowledge to the base knowledge store"""
-
-    def __init__(self, hippo_client=None, ollama_url="http://localhost:11434"):
-        if hippo_client:
-            self.hippo = hippo_client
-        elif HippocampusClient:
-            self.hippo = HippocampusClient(host="localhost", port=6379)
-        else:
-            raise Exception("HippocampusClient not available")
-
-        self.ollama_url = ollama_url
-        self.BASE_KB = "base_knowledge"
-
-    def format_knowledge(self, raw_information):
-        """
-        Use LLM to format raw information into structured knowledge
-        Returns formatted knowledge suitable for base store
-        """
-        system_prompt = """You are a knowledge curator for an IT support system.
+# Sent unchanged at the start of every curation request, so Ollama can reuse
+# its cached prefix while the model stays loaded
+CURATOR_SYSTEM_PROMPT = """You are a knowledge curator for an IT support system.
 
 Your job is to take raw information and format it into clear, actionable knowledge entries.
 
@@ -62,30 +45,107 @@ Output: "VPN CONNECTION - Setup Instructions:
 
 Now format the following information:"""
 
+
+# Today's date for fallback entries, recomputed only once the local day rolls over
+_today_cache = {'date': '', 'until': 0.0}
+
+
+def _today():
+    """Local date as YYYY-MM-DD"""
+    now = time.time()
+    if now >= _today_cache['until']:
+        today = datetime.fromtimestamp(now)
+        midnight = datetime(today.year, today.month, today.day) + timedelta(days=1)
+        _today_cache['date'] = today.strftime('%Y-%m-%d')
+        _today_cache['until'] = midnight.timestamp()
+    return _today_cache['date']
+
+
+class CuratorAgent:
+    """Agent that curates and adds knowledge to the base knowledge store"""
+
+    def __init__(self, hippo_client=None, ollama_url="http://localhost:11434"):
+        if hippo_client:
+            self.hippo = hippo_client
+        else:
+            self.hippo = HippocampusClient(host="localhost", port=6379)
+
+        self.ollama_url = ollama_url
+        # (connect, read) - an unreachable Ollama fails in seconds; generation may take minutes
+        self.ollama_timeout = (5, 120)
+        # Stop calling an Ollama that keeps failing instead of tying up a worker per request
+        self.ollama_breaker = CircuitBreaker(failure_threshold=5, cooldown=30.0)
+        # How long Ollama keeps the model (and the prompt prefix cache) loaded between calls
+        self.keep_alive = os.getenv('OLLAMA_KEEP_ALIVE', '10m')
+
+        # Pooled, retrying connections for Ollama calls
+        self.session = ollama_session()
+
+        self.BASE_KB = "base_knowledge"
+        # Formatted results persisted across restarts, stored as "<digest>\n<formatted>"
+        self.CACHE_KB = "curator_cache"
+
+        # Formatting the same raw information again returns the earlier result
+        self.format_cache = ResponseCache(max_entries=500, ttl=3600.0)
+
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
+
+    def _stored_format(self, digest, raw_information):
+        """
+        Formatted text persisted for this exact raw information, or None
+        Hippocampus only searches by similarity, so candidates are confirmed by their digest prefix
+        """
+        prefix = f"{digest}\n"
+        for text in self.hippo.search(self.CACHE_KB, raw_information, top_k=3):
+            if text.startswith(prefix):
+                return text[len(prefix):]
+        return None
+
+    def format_knowledge(self, raw_information):
+        """
+        Use LLM to format raw information into structured knowledge
+        Returns formatted knowledge suitable for base store
+        """
+        cache_key = None
+        if self.format_cache is not None:
+            cache_key = ResponseCache.key(raw_information)
+            cached = self.format_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Exact duplicates curated earlier (e.g. re-running a bulk import) skip the LLM
+        digest = hashlib.blake2b(raw_information.encode(), digest_size=16).hexdigest()
+        stored = self._stored_format(digest, raw_information)
+        if stored is not None:
+            if cache_key is not None:
+                self.format_cache.put(cache_key, stored)
+            return stored
+
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": CURATOR_SYSTEM_PROMPT},
             {"role": "user", "content": raw_information}
         ]
 
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/chat",
-                json={
-                    "model": "llama3.2:1b",
-                    "messages": messages,
-                    "stream": False
-                },
-                timeout=180
-            )
-            response.raise_for_status()
-            result = response.json()
+            response = post_ollama_chat(self.session, self.ollama_url, {
+                "model": "llama3.2:1b",
+                "messages": messages,
+                "keep_alive": self.keep_alive,
+                "options": {"num_ctx": 2048}
+            }, self.ollama_timeout, breaker=self.ollama_breaker)
+            result = loads_json(response.content)
             formatted_knowledge = result['message']['content']
+            if cache_key is not None:
+                self.format_cache.put(cache_key, formatted_knowledge)
+            self.hippo.insert_async(self.CACHE_KB, digest, f"{digest}\n{formatted_knowledge}")
             return formatted_knowledge
 
         except Exception as e:
             print(f"Error formatting knowledge with LLM: {e}")
             # Fallback: return raw information with timestamp
-            return f"[{datetime.now().strftime('%Y-%m-%d')}] {raw_information}"
+            return f"[{_today()}] {raw_information}"
 
     def add_knowledge(self, category, raw_information):
         """
@@ -164,11 +224,16 @@ Now format the following information:"""
 
 # Singleton instance
 _curator_instance = None
+_curator_lock = threading.Lock()
 
 
 def get_curator_agent(hippo_client=None, ollama_url="http://localhost:11434"):
     """Get or create curator agent instance"""
     global _curator_instance
     if _curator_instance is None:
-        _curator_instance = CuratorAgent(hippo_client=hippo_client, ollama_url=ollama_url)
+        # Concurrent first requests must not each build an agent (and its connection pools)
+        with _curator_lock:
+            if _curator_instance is None:
+                _curator_instance = CuratorAgent(hippo_client=hippo_client, ollama_url=ollama_url)
+                atexit.register(_curator_instance.close)
     return _curator_instance
@@ -1,14 +1,47 @@
 import os
+import asyncio
+import atexit
 import json
-import requests
+import re
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
 
-# Import the existing HippocampusClient
-try:
-    from agent import HippocampusClient
-except ImportError:
-    # Fallback if agent module not available
-    HippocampusClient = None
+# Import the existing HippocampusClient and the shared Ollama plumbing
+from agent import (HippocampusClient, ResponseCache, CircuitBreaker, dumps_json, loads_json, STREAM_ERROR_MARKER,
+                   ollama_session, post_ollama_chat, iter_ollama_content, ollama_chat_error)
+
+# Keywords extract_user_facts looks for, in priority order within each group
+_COMPUTER_TYPES = (
+    ('Mac', ('mac', 'macbook', 'imac')),
+    ('Windows', ('windows', 'pc')),
+    ('Linux', ('linux', 'ubuntu')),
+)
+_DEPARTMENT_CUES = ('work in', 'department')
+_DEPARTMENTS = ('engineering', 'sales', 'marketing', 'hr', 'finance', 'support')
+_LOCATION_CUES = ('located in', 'office in', 'based in')
+_LOCATIONS = ('new york', 'san francisco', 'london', 'tokyo', 'sydney', 'toronto')
+
+# Whole words only, so "pc" no longer fires on "upcoming" or "hr" on "three"; a trailing
+# "s" is allowed so plurals like "PCs" and "Macs" still count
+_FACT_KEYWORD_RE = re.compile(r"\b(%s)s?\b" % "|".join(
+    re.escape(keyword) for keyword in sorted(
+        {k for _, keywords in _COMPUTER_TYPES for k in keywords}
+        | set(_DEPARTMENT_CUES) | set(_DEPARTMENTS) | set(_LOCATION_CUES) | set(_LOCATIONS),
+        key=len, reverse=True)))
+
+# Fixed parts of the system prompt; the KB context sections go between them
+_SYSTEM_PROMPT_HEADER = """You are a helpful IT support agent.
+
+IMPORTANT: Use the information below to answer questions about this specific user:
+"""
+_SYSTEM_PROMPT_INSTRUCTIONS = """
+Instructions:
+- Answer questions using the USER-SPECIFIC INFORMATION above
+- If asked about the user's computer/OS, refer to the information provided
+- Provide clear, actionable IT support
+- Be concise and direct"""
 
 class HippocampusKBAgent:
     """IT Support Agent using Hippocampus for all knowledge storage"""
@@ -16,18 +49,48 @@ class HippocampusKBAgent:
     def __init__(self, hippo_client=None, ollama_url="http://localhost:11434"):
         if hippo_client:
             self.hippo = hippo_client
-        elif HippocampusClient:
-            self.hippo = HippocampusClient(host="localhost", port=6379)
         else:
-            raise Exception("HippocampusClient not available")
+            self.hippo = HippocampusClient(host="localhost", port=6379)
 
         self.ollama_url = ollama_url
+        # (connect, read) - an unreachable Ollama fails in seconds; generation may take minutes
+        self.ollama_timeout = (5, 120)
+        # Stop calling an Ollama that keeps failing instead of tying up a worker per request
+        self.ollama_breaker = CircuitBreaker(failure_threshold=5, cooldown=30.0)
+        # Pooled, retrying connections for Ollama calls
+        self.session = ollama_session()
+
+        # Replies to repeat prompts (same KB context, history and question) skip the LLM
+        self.response_cache = ResponseCache(max_entries=1000, ttl=300.0)
+
+        # Micro-batching for achat: Ollama requests arriving within max_wait_ms of each other
+        # are dispatched together, identical requests share one call, and at most max_batch
+        # are in flight at once (run Ollama with OLLAMA_NUM_PARALLEL >= max_batch)
+        self.max_batch = 8
+        self.max_wait_ms = 10
+        self._batch_loop = None
+        self._batch_queue = None
+        self._batch_slots = None
+        self._batch_tasks = set()
+
+        # Recent build_context results keyed by (username, normalized message, KB versions)
+        # Each write through this agent bumps its namespace's version, so a cached context
+        # never outlives a change made here - the TTL covers writes made by other clients
+        self.context_cache_size = 1024
+        self.context_cache_ttl = 60.0
+        self._context_cache = OrderedDict()
+        self._kb_versions = {}
+        self._context_lock = threading.Lock()
 
         # Hippocampus namespace prefixes
         self.BASE_KB = "base_knowledge"
         self.COMP_KB = "completed_issues"
         self.USER_KB_PREFIX = "user_specific_"
 
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
+
     def search_base_knowledge(self, query, limit=3):
         """Search company-wide base knowledge in Hippocampus"""
         try:
@@ -61,6 +124,8 @@ class HippocampusKBAgent:
         """Add knowledge to base KB (admin only)"""
         try:
             success = self.hippo.insert(self.BASE_KB, key, content)
+            if success:
+                self._bump_version(self.BASE_KB)
             return success
         except Exception as e:
             print(f"Error adding base knowledge: {e}")
@@ -69,8 +134,10 @@ class HippocampusKBAgent:
     def add_completed_issue(self, issue_id, issue_data):
         """Add resolved issue to completed issues KB"""
         try:
-            content = json.dumps(issue_data) if isinstance(issue_data, dict) else issue_data
+            content = dumps_json(issue_data).decode() if isinstance(issue_data, dict) else issue_data
             success = self.hippo.insert(self.COMP_KB, issue_id, content)
+            if success:
+                self._bump_version(self.COMP_KB)
             return success
         except Exception as e:
             print(f"Error adding completed issue: {e}")
@@ -81,75 +148,164 @@ class HippocampusKBAgent:
         try:
             user_namespace = f"{self.USER_KB_PREFIX}{username}"
             success = self.hippo.insert(user_namespace, key, content)
+            if success:
+                self._bump_version(user_namespace)
             return success
         except Exception as e:
             print(f"Error adding user knowledge: {e}")
             return False
 
+    def _add_many(self, namespace, items):
+        """Insert (key, content) pairs into a namespace in one pipelined round-trip"""
+        results = self.hippo.insert_many(namespace, items)
+        if any(results):
+            self._bump_version(namespace)
+        return results
+
+    def add_base_knowledge_bulk(self, entries):
+        """Add several (key, content) entries to base KB - returns one success flag per entry"""
+        return self._add_many(self.BASE_KB, list(entries))
+
+    def add_completed_issues_bulk(self, issues):
+        """Add several (issue_id, issue_data) resolved issues - returns one success flag per issue"""
+        return self._add_many(self.COMP_KB, [
+            (issue_id, dumps_json(issue_data).decode() if isinstance(issue_data, dict) else issue_data)
+            for issue_id, issue_data in issues
+        ])
+
+    def add_user_knowledge_bulk(self, username, entries):
+        """Add several (key, content) entries to a user's KB - returns one success flag per entry"""
+        return self._add_many(f"{self.USER_KB_PREFIX}{username}", list(entries))
+
+    def _bump_version(self, namespace):
+        """Invalidate cached contexts that searched a namespace this agent just wrote to"""
+        with self._context_lock:
+            self._kb_versions[namespace] = self._kb_versions.get(namespace, 0) + 1
+
+    def _context_key(self, username, user_message):
+        """Cache key for a context - rephrasings differing only in case/spacing share it"""
+        normalized = " ".join(user_message.lower().split())
+        with self._context_lock:
+            versions = (
+                self._kb_versions.get(self.BASE_KB, 0),
+                self._kb_versions.get(self.COMP_KB, 0),
+                self._kb_versions.get(f"{self.USER_KB_PREFIX}{username}", 0),
+            )
+        return (username, normalized) + versions
+
+    def _get_cached_context(self, key):
+        """Cached context for key, or None if missing or older than context_cache_ttl"""
+        with self._context_lock:
+            entry = self._context_cache.get(key)
+            if entry is None:
+                return None
+            context, stored_at = entry
+            if time.monotonic() - stored_at > self.context_cache_ttl:
+                del self._context_cache[key]
+                return None
+            self._context_cache.move_to_end(key)
+            return context
+
+    def _store_context(self, key, context):
+        """Cache a context, evicting the least recently used entry when full"""
+        with self._context_lock:
+            self._context_cache[key] = (context, time.monotonic())
+            self._context_cache.move_to_end(key)
+            while len(self._context_cache) > self.context_cache_size:
+                self._context_cache.popitem(last=False)
+
+    def _search_all(self, username, user_message, limit=3):
+        """
+        Search all 3 KBs in one pipelined Hippocampus round-trip
+        Returns (context, complete) - a failed search contributes no hits and clears complete
+        """
+        base_knowledge, completed_issues, user_knowledge = self.hippo.search_many([
+            (self.BASE_KB, user_message, limit),
+            (self.COMP_KB, user_message, limit),
+            (f"{self.USER_KB_PREFIX}{username}", user_message, limit),
+        ])
+        complete = None not in (base_knowledge, completed_issues, user_knowledge)
+        return {
+            'base_knowledge': base_knowledge or [],
+            'completed_issues': completed_issues or [],
+            'user_knowledge': user_knowledge or []
+        }, complete
+
     def build_context(self, username, user_message):
         """Build context from all 3 Hippocampus KBs"""
-        context = {
-            'base_knowledge': self.search_base_knowledge(user_message),
-            'completed_issues': self.search_completed_issues(user_message),
-            'user_knowledge': self.search_user_knowledge(username, user_message)
-        }
+        key = self._context_key(username, user_message)
+        context = self._get_cached_context(key)
+        if context is not None:
+            return context
+
+        context, complete = self._search_all(username, user_message)
+        # A Hippocampus failure must not be served from the cache as "no hits"
+        if complete:
+            self._store_context(key, context)
         return context
 
-    def format_context_for_llm(self, context):
-        """Format Hippocampus search results for LLM"""
+    async def abuild_context(self, username, user_message):
+        """Async build_context - the pipelined KB search runs in a worker thread"""
+        key = self._context_key(username, user_message)
+        context = self._get_cached_context(key)
+        if context is not None:
+            return context
+
+        context, complete = await asyncio.to_thread(self._search_all, username, user_message)
+        if complete:
+            self._store_context(key, context)
+        return context
+
+    def _context_sections(self, context):
+        """One prompt section per non-empty KB result list"""
         prompt_parts = []
 
         # Add base knowledge
         if context['base_knowledge']:
-            prompt_parts.append("📋 COMPANY POLICIES & PROCEDURES:")
-            for item in context['base_knowledge']:
-                prompt_parts.append(f"- {item}")
+            prompt_parts.append("COMPANY POLICIES & PROCEDURES:\n- " + "\n- ".join(context['base_knowledge']))
 
         # Add completed issues
         if context['completed_issues']:
-            prompt_parts.append("\n🔧 SIMILAR PAST ISSUES & SOLUTIONS:")
-            for item in context['completed_issues']:
-                prompt_parts.append(f"- {item}")
+            prompt_parts.append("\nSIMILAR PAST ISSUES & SOLUTIONS:\n- " + "\n- ".join(context['completed_issues']))
 
         # Add user-specific knowledge
         if context['user_knowledge']:
-            prompt_parts.append("\n👤 USER-SPECIFIC INFORMATION:")
-            for item in context['user_knowledge']:
-                prompt_parts.append(f"- {item}")
+            prompt_parts.append("\nUSER-SPECIFIC INFORMATION:\n- " + "\n- ".join(context['user_knowledge']))
+
+        return prompt_parts
 
-        return "\n".join(prompt_parts)
+    def format_context_for_llm(self, context):
+        """Format Hippocampus search results for LLM"""
+        return "\n".join(self._context_sections(context))
 
     def extract_user_facts(self, username, user_message, bot_response):
         """Extract and store user-specific facts from conversation"""
-        message_lower = user_message.lower()
+        # One scan over the message finds every keyword; the checks below are set lookups
+        found = {m.group(1) for m in _FACT_KEYWORD_RE.finditer(user_message.lower())}
 
         # Simple pattern matching for common user facts
         facts_stored = []
 
         # Computer/device type
-        if 'mac' in message_lower or 'macbook' in message_lower or 'imac' in message_lower:
-            self.add_user_knowledge(username, 'computer_type', 'User has a Mac computer')
-            facts_stored.append('computer_type: Mac')
-        elif 'windows' in message_lower or 'pc' in message_lower:
-            self.add_user_knowledge(username, 'computer_type', 'User has a Windows computer')
-            facts_stored.append('computer_type: Windows')
-        elif 'linux' in message_lower or 'ubuntu' in message_lower:
-            self.add_user_knowledge(username, 'computer_type', 'User has a Linux computer')
-            facts_stored.append('computer_type: Linux')
+        for computer_type, keywords in _COMPUTER_TYPES:
+            if not found.isdisjoint(keywords):
+                self.add_user_knowledge(username, 'computer_type', f'User has a {computer_type} computer')
+                facts_stored.append(f'computer_type: {computer_type}')
+                break
 
         # Department mentions
-        if 'work in' in message_lower or 'department' in message_lower:
-            for dept in ['engineering', 'sales', 'marketing', 'hr', 'finance', 'support']:
-                if dept in message_lower:
+        if not found.isdisjoint(_DEPARTMENT_CUES):
+            for dept in _DEPARTMENTS:
+                if dept in found:
                     self.add_user_knowledge(username, 'department', f'User works in {dept} department')
                     facts_stored.append(f'department: {dept}')
                     break
 
         # Location mentions
-        if 'located in' in message_lower or 'office in' in message_lower or 'based in' in message_lower:
+        if not found.isdisjoint(_LOCATION_CUES):
             # Extract location (simplified)
-            for location in ['new york', 'san francisco', 'london', 'tokyo', 'sydney', 'toronto']:
-                if location in message_lower:
+            for location in _LOCATIONS:
+                if location in found:
                     self.add_user_knowledge(username, 'location', f'User is located in {location}')
                     facts_stored.append(f'location: {location}')
                     break
@@ -159,75 +315,192 @@ class HippocampusKBAgent:
 
         return facts_stored
 
-    def chat(self, username, user_message, conversation_history=[]):
-        """Main chat method using Hippocampus for knowledge"""
-
-        # Build context from all Hippocampus KBs
-        context = self.build_context(username, user_message)
-        context_prompt = self.format_context_for_llm(context)
-
-        # Build system prompt
-        system_prompt = f"""You are a helpful IT support agent.
-
-IMPORTANT: Use the information below to answer questions about this specific user:
+    def _build_messages(self, context, user_message, conversation_history):
+        """Build the Ollama message list from the KB context and recent conversation"""
+        # Build system prompt - the header, KB sections and instructions are copied
+        # into the prompt string once, rather than formatting the context first
+        system_prompt = "\n".join([_SYSTEM_PROMPT_HEADER, *self._context_sections(context), _SYSTEM_PROMPT_INSTRUCTIONS])
+
+        # Build messages for Ollama: system prompt, the last 5 history messages, then the question
+        history = deque(conversation_history or (), maxlen=5)
+        return [{"role": "system", "content": system_prompt}, *history, {"role": "user", "content": user_message}]
+
+    def _post_chat(self, messages, stream=False):
+        """POST messages to Ollama's /api/chat through the circuit breaker and return the response"""
+        return post_ollama_chat(
+            self.session, self.ollama_url, {"model": "llama3.2:1b", "messages": messages},
+            self.ollama_timeout, breaker=self.ollama_breaker, stream=stream
+        )
+
+    def _call_ollama(self, messages):
+        """Send messages to Ollama and return the reply text"""
+        response = self._post_chat(messages)
+        result = loads_json(response.content)
+        return result['message']['content']
+
+    def _stream_ollama(self, messages):
+        """Send messages to Ollama with streaming on, yielding reply text as it is generated"""
+        yield from iter_ollama_content(self._post_chat(messages, stream=True))
+
+    async def _submit_chat(self, messages):
+        """Queue messages for the batch dispatcher and wait for the reply text"""
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            # Queues and tasks belong to one event loop - start a dispatcher for this one
+            self._batch_loop = loop
+            self._batch_queue = asyncio.Queue()
+            self._batch_slots = asyncio.Semaphore(self.max_batch)
+            self._spawn(self._run_batches(self._batch_queue))
+
+        future = loop.create_future()
+        await self._batch_queue.put((messages, future))
+        return await future
+
+    def _spawn(self, coro):
+        """Start a background task, holding a reference until it finishes"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batches(self, batch_queue):
+        """Collect queued requests into micro-batches and dispatch each one"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await batch_queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
 
-{context_prompt}
+            # Identical requests in a batch share one Ollama call
+            pending = {}
+            for messages, future in batch:
+                key = json.dumps(messages, sort_keys=True)
+                pending.setdefault(key, (messages, []))[1].append(future)
+
+            # Dispatch without waiting, so a slow batch doesn't hold up the next one
+            for messages, futures in pending.values():
+                self._spawn(self._dispatch(messages, futures))
+
+    async def _dispatch(self, messages, futures):
+        """Send one request (bounded by max_batch in flight) and resolve every waiter"""
+        async with self._batch_slots:
+            try:
+                result = await asyncio.to_thread(self._call_ollama, messages)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for future in futures:
+            if not future.done():
+                future.set_result(result)
+
+    def _finish_chat(self, username, user_message, context, bot_response):
+        """Learn user facts from the exchange and build the chat result"""
+        # Extract and store user facts from conversation
+        self.extract_user_facts(username, user_message, bot_response)
+
+        return {
+            'response': bot_response,
+            'context_used': {
+                'base_knowledge_count': len(context['base_knowledge']),
+                'completed_issues_count': len(context['completed_issues']),
+                'user_knowledge_count': len(context['user_knowledge'])
+            }
+        }
 
-Instructions:
-- Answer questions using the USER-SPECIFIC INFORMATION above
-- If asked about the user's computer/OS, refer to the information provided
-- Provide clear, actionable IT support
-- Be concise and direct"""
+    def _cached_reply(self, messages):
+        """(cache key, cached reply or None) for a message list"""
+        if self.response_cache is None:
+            return None, None
+        key = ResponseCache.key(messages)
+        return key, self.response_cache.get(key)
 
-        # Build messages for Ollama
-        messages = [{"role": "system", "content": system_prompt}]
+    def _cache_reply(self, key, bot_response):
+        """Remember a fresh reply under the key returned by _cached_reply"""
+        if key is not None:
+            self.response_cache.put(key, bot_response)
 
-        # Add conversation history
-        for msg in conversation_history[-5:]:
-            messages.append(msg)
+    def chat(self, username, user_message, conversation_history=None):
+        """Main chat method using Hippocampus for knowledge"""
 
-        messages.append({"role": "user", "content": user_message})
+        # Build context from all Hippocampus KBs
+        context = self.build_context(username, user_message)
+        messages = self._build_messages(context, user_message, conversation_history)
 
-        # Call Ollama API
+        # Call Ollama API (unless this exact prompt was answered recently)
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/chat",
-                json={
-                    "model": "llama3.2:1b",
-                    "messages": messages,
-                    "stream": False
-                },
-                timeout=180
-            )
-            response.raise_for_status()
-            result = response.json()
+            cache_key, bot_response = self._cached_reply(messages)
+            if bot_response is None:
+                bot_response = self._call_ollama(messages)
+                self._cache_reply(cache_key, bot_response)
+            return self._finish_chat(username, user_message, context, bot_response)
+        except Exception as e:
+            return ollama_chat_error(e)
 
-            bot_response = result['message']['content']
+    async def achat(self, username, user_message, conversation_history=None):
+        """
+        Async variant of chat() for callers running on an event loop
+        The KB searches overlap, and the blocking Ollama/Hippocampus calls run in worker threads
+        """
+        context = await self.abuild_context(username, user_message)
+        messages = self._build_messages(context, user_message, conversation_history)
 
-            # Extract and store user facts from conversation
-            self.extract_user_facts(username, user_message, bot_response)
+        try:
+            cache_key, bot_response = self._cached_reply(messages)
+            if bot_response is None:
+                bot_response = await self._submit_chat(messages)
+                self._cache_reply(cache_key, bot_response)
+            return await asyncio.to_thread(self._finish_chat, username, user_message, context, bot_response)
+        except Exception as e:
+            return ollama_chat_error(e)
+
+    def stream_chat(self, username, user_message, conversation_history=None):
+        """
+        Streaming variant of chat() - yields reply text as Ollama generates it
+        User facts are learned and the reply cached once the stream is read to the end;
+        closing the generator early stops generation
+        If Ollama fails, the last chunk is STREAM_ERROR_MARKER plus the error, and the
+        incomplete reply is neither cached nor learned from
+        """
+        context = self.build_context(username, user_message)
+        messages = self._build_messages(context, user_message, conversation_history)
 
-            return {
-                'response': bot_response,
-                'context_used': {
-                    'base_knowledge_count': len(context['base_knowledge']),
-                    'completed_issues_count': len(context['completed_issues']),
-                    'user_knowledge_count': len(context['user_knowledge'])
-                }
-            }
+        cache_key, bot_response = self._cached_reply(messages)
+        if bot_response is not None:
+            yield bot_response
+            self._finish_chat(username, user_message, context, bot_response)
+            return
 
+        parts = []
+        try:
+            for content in self._stream_ollama(messages):
+                parts.append(content)
+                yield content
         except Exception as e:
-            print(f"Ollama API error: {e}")
-            return {
-                'response': f"I'm having trouble connecting to my AI engine. Error: {str(e)}",
-                'error': str(e)
-            }
+            yield STREAM_ERROR_MARKER + ollama_chat_error(e)['response']
+            return
+
+        bot_response = "".join(parts)
+        self._cache_reply(cache_key, bot_response)
+        self._finish_chat(username, user_message, context, bot_response)
 
 # Singleton instance
 _agent_instance = None
+_agent_lock = threading.Lock()
 
 def get_hippo_agent(hippo_client=None, ollama_url="http://localhost:11434"):
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = HippocampusKBAgent(hippo_client=hippo_client, ollama_url=ollama_url)
+        # Concurrent first requests must not each build an agent (and its connection pools)
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = HippocampusKBAgent(hippo_client=hippo_client, ollama_url=ollama_url)
+                atexit.register(_agent_instance.close)
     return _agent_instance
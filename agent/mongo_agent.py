@@ -1,9 +1,66 @@
 import os
-import json
+import asyncio
+import atexit
+import threading
 import requests
-from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from pymongo import MongoClient, ReturnDocument, UpdateOne
 from datetime import datetime
 
+from agent import ResponseCache, STREAM_ERROR_MARKER, post_ollama_chat, iter_ollama_content, ollama_chat_error
+
+# Longest content/solution excerpt the prompt uses
+SNIPPET_CHARS = 200
+
+# Projections for the KB searches - only the fields the prompt uses come back from Mongo,
+# with the long text fields cut to SNIPPET_CHARS server-side
+BASE_KNOWLEDGE_FIELDS = {
+    '_id': 0, 'title': 1, 'category': 1,
+    'content': {'$substrCP': ['$content', 0, SNIPPET_CHARS]}
+}
+COMPLETED_ISSUE_FIELDS = {
+    '_id': 0, 'issueTitle': 1, 'issueDescription': 1, 'category': 1,
+    'solutionSteps': {'$substrCP': ['$solutionSteps', 0, SNIPPET_CHARS]}
+}
+
+# Fixed part of the system prompt, sent ahead of the per-turn context
+SYSTEM_INSTRUCTIONS = """You are a helpful IT support agent. Use the information below to assist the user.
+
+Instructions:
+- Provide clear, actionable IT support
+- Reference company policies when relevant
+- Suggest solutions from past resolved issues
+- Adapt your communication style to the user's technical level
+- Be concise but thorough
+- If you don't have enough information, ask clarifying questions"""
+
+# Estimated tokens of conversation history sent with each turn
+HISTORY_TOKEN_BUDGET = 2048
+
+
+def estimate_tokens(text):
+    """Rough token count - BPE tokenizers average about 4 characters of English per token"""
+    return len(text) // 4 + 1
+
+
+
+def _knowledge_text(doc):
+    """Text embedded for a base knowledge document"""
+    return f"{doc.get('title', '')}\n{doc.get('content', '')}"
+
+
+def _completed_issues_search_key(category=None):
+    """Search cache namespace for completed-issue results, one per category filter"""
+    return f"completedissues:{category or ''}"
+
+
+def _issue_text(doc):
+    """Text embedded for a completed issue document"""
+    return f"{doc.get('issueTitle', '')}\n{doc.get('issueDescription', '')}\n{doc.get('solutionSteps', '')}"
+
+
 class ITSupportAgent:
     """IT Support Agent with 3-tier knowledge base integration"""
 
@@ -12,23 +69,176 @@ class ITSupportAgent:
         self.db = self.mongo_client['it-support-agent']
         self.ollama_url = ollama_url
 
+        # Keep-alive connection pool for Ollama calls instead of a new connection per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'})
+
         # Collections for 3-tier knowledge base
         self.base_knowledge = self.db['baseknowledges']
         self.completed_issues = self.db['completedissues']
         self.user_profiles = self.db['userprofiles']
+        self.ensure_indexes()
+
+        # Worker threads for build_context - the three lookups are independent
+        # round-trips, so they overlap instead of running back to back
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="kb-lookup")
+
+        # Profiles rarely change, so a returning user's profile is read from Mongo
+        # at most once a minute rather than on every chat turn
+        self.profile_cache = ResponseCache(max_entries=4096, ttl=60.0)
+
+        # Text-search results for repeated questions (case/whitespace-insensitive)
+        self.search_cache = ResponseCache(max_entries=2048, ttl=300.0)
 
-    def search_base_knowledge(self, query, limit=5):
+        # Semantic search over stored document embeddings (MongoDB Atlas $vectorSearch)
+        # Set MONGO_VECTOR_INDEX to the name of a vectorSearch index on the "embedding"
+        # field of both collections (filter fields: isActive on baseknowledges, category
+        # on completedissues), then run backfill_embeddings() once; unset, searches use
+        # the $text index
+        self.vector_index = os.getenv('MONGO_VECTOR_INDEX')
+        self.embed_model = os.getenv('OLLAMA_EMBED_MODEL', 'nomic-embed-text')
+        self.embedding_cache = ResponseCache(max_entries=2048, ttl=3600.0)
+
+    def ensure_indexes(self):
+        """
+        Create the indexes the searches rely on, so they never fall back to collection scans
+        Specs match the server's mongoose schemas (a collection allows only one text index),
+        which makes this a no-op when the server has already created them
+        """
+        try:
+            self.base_knowledge.create_index([('title', 'text'), ('content', 'text'), ('tags', 'text')])
+            self.completed_issues.create_index([
+                ('issueTitle', 'text'), ('issueDescription', 'text'), ('symptoms', 'text'), ('tags', 'text')
+            ])
+            self.user_profiles.create_index('username', unique=True)
+        except Exception as e:
+            print(f"Index creation error: {e}")
+
+    def close(self):
+        """Close pooled HTTP connections and lookup threads"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def _embed(self, texts):
+        """Embed texts with Ollama's embedding model - empty list on failure"""
+        try:
+            response = self.session.post(
+                f"{self.ollama_url}/api/embed",
+                json={"model": self.embed_model, "input": texts},
+                timeout=30
+            )
+            response.raise_for_status()
+            return response.json().get("embeddings", [])
+        except Exception as e:
+            print(f"Embedding error: {e}")
+            return []
+
+    def _query_embedding(self, query):
+        """Embedding for a search query, cached so repeated questions embed once"""
+        key = ResponseCache.key(query) if self.embedding_cache is not None else None
+        if key is not None:
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                return cached
+        embeddings = self._embed([query])
+        if not embeddings:
+            return None
+        if key is not None:
+            self.embedding_cache.put(key, embeddings[0])
+        return embeddings[0]
+
+    def _vector_search(self, collection, query, limit, fields, search_filter=None, query_embedding=None):
+        """
+        Top-limit documents by embedding similarity to the query
+        Returns None when vector search is disabled or the query can't be embedded,
+        so the caller falls back to text search
+        """
+        if not self.vector_index:
+            return None
+        embedding = query_embedding if query_embedding is not None else self._query_embedding(query)
+        if embedding is None:
+            return None
+        vector_search = {
+            'index': self.vector_index,
+            'path': 'embedding',
+            'queryVector': embedding,
+            'numCandidates': limit * 20,
+            'limit': limit
+        }
+        if search_filter:
+            vector_search['filter'] = search_filter
+        return list(collection.aggregate([
+            {'$vectorSearch': vector_search},
+            {'$project': {**fields, 'score': {'$meta': 'vectorSearchScore'}}}
+        ]))
+
+    def backfill_embeddings(self, batch_size=32):
+        """
+        Store an embedding on every knowledge and issue document that lacks one
+        Returns the number of documents updated
+        """
+        updated = 0
+        for collection, text_of in ((self.base_knowledge, _knowledge_text), (self.completed_issues, _issue_text)):
+            docs = list(collection.find(
+                {'embedding': {'$exists': False}},
+                {'title': 1, 'content': 1, 'issueTitle': 1, 'issueDescription': 1, 'solutionSteps': 1}
+            ))
+            for start in range(0, len(docs), batch_size):
+                batch = docs[start:start + batch_size]
+                embeddings = self._embed([text_of(doc) for doc in batch])
+                if len(embeddings) != len(batch):
+                    print(f"Embedding backfill stopped: Ollama returned {len(embeddings)} of {len(batch)}")
+                    return updated
+                collection.bulk_write([
+                    UpdateOne({'_id': doc['_id']}, {'$set': {'embedding': embedding}})
+                    for doc, embedding in zip(batch, embeddings)
+                ], ordered=False)
+                updated += len(batch)
+        return updated
+
+    def _cached_search(self, collection, query, limit):
+        """(cache key, cached results or None) for a text search"""
+        if self.search_cache is None:
+            return None, None
+        key = ResponseCache.key(collection, query, str(limit), normalize=True)
+        return key, self.search_cache.get(key)
+
+    def _search_embedding(self, query, limit=5):
+        """
+        Query embedding to share between both knowledge base searches - None when vector
+        search is off, or when both searches (with this limit) will be answered from the
+        search cache, so a cached turn never calls Ollama
+        """
+        if not self.vector_index:
+            return None
+        if all(self._cached_search(collection, query, limit)[1] is not None
+               for collection in ('baseknowledges', _completed_issues_search_key())):
+            return None
+        return self._query_embedding(query)
+
+    def search_base_knowledge(self, query, limit=5, query_embedding=None):
         """Search company-wide base knowledge"""
+        cache_key, cached = self._cached_search('baseknowledges', query, limit)
+        if cached is not None:
+            return cached
+
         try:
-            results = list(self.base_knowledge.find(
-                {
-                    '$text': {'$search': query},
-                    'isActive': True
-                },
-                {'score': {'$meta': 'textScore'}}
-            ).sort([('score', {'$meta': 'textScore'})]).limit(limit))
+            results = self._vector_search(
+                self.base_knowledge, query, limit, BASE_KNOWLEDGE_FIELDS, {'isActive': True}, query_embedding
+            )
+            if results is None:
+                results = list(self.base_knowledge.find(
+                    {
+                        '$text': {'$search': query},
+                        'isActive': True
+                    },
+                    {**BASE_KNOWLEDGE_FIELDS, 'score': {'$meta': 'textScore'}}
+                ).sort([('score', {'$meta': 'textScore'})]).batch_size(limit).limit(limit))
 
-            return [
+            knowledge = [
                 {
                     'title': r['title'],
                     'content': r['content'],
@@ -37,10 +247,13 @@ class ITSupportAgent:
                 }
                 for r in results
             ]
+            if cache_key is not None:
+                self.search_cache.put(cache_key, knowledge)
+            return knowledge
         except Exception as e:
             print(f"Base knowledge search error: {e}")
             # Fallback to simple query
-            results = list(self.base_knowledge.find({'isActive': True}).limit(limit))
+            results = list(self.base_knowledge.find({'isActive': True}, BASE_KNOWLEDGE_FIELDS).batch_size(limit).limit(limit))
             return [
                 {
                     'title': r['title'],
@@ -51,15 +264,24 @@ class ITSupportAgent:
                 for r in results
             ]
 
-    def search_completed_issues(self, query, limit=5):
-        """Search completed issues with solutions"""
+    def search_completed_issues(self, query, limit=5, category=None, query_embedding=None):
+        """Search completed issues with solutions, optionally only those in one category"""
+        cache_key, cached = self._cached_search(_completed_issues_search_key(category), query, limit)
+        if cached is not None:
+            return cached
+
         try:
-            results = list(self.completed_issues.find(
-                {'$text': {'$search': query}},
-                {'score': {'$meta': 'textScore'}}
-            ).sort([('score', {'$meta': 'textScore'})]).limit(limit))
+            category_filter = {'category': category} if category else {}
+            results = self._vector_search(
+                self.completed_issues, query, limit, COMPLETED_ISSUE_FIELDS, category_filter, query_embedding
+            )
+            if results is None:
+                results = list(self.completed_issues.find(
+                    {'$text': {'$search': query}, **category_filter},
+                    {**COMPLETED_ISSUE_FIELDS, 'score': {'$meta': 'textScore'}}
+                ).sort([('score', {'$meta': 'textScore'})]).batch_size(limit).limit(limit))
 
-            return [
+            issues = [
                 {
                     'title': r['issueTitle'],
                     'description': r['issueDescription'],
@@ -69,18 +291,26 @@ class ITSupportAgent:
                 }
                 for r in results
             ]
+            if cache_key is not None:
+                self.search_cache.put(cache_key, issues)
+            return issues
         except Exception as e:
             print(f"Completed issues search error: {e}")
             return []
 
     def get_user_profile(self, username):
         """Get user-specific profile and preferences"""
+        if self.profile_cache is not None:
+            cached = self.profile_cache.get(username)
+            if cached is not None:
+                return cached
+
         try:
-            profile = self.user_profiles.find_one({'username': username})
-            if not profile:
-                # Create default profile
-                profile = {
-                    'username': username,
+            # Fetch the profile, creating the default one on first access, in a single
+            # atomic round-trip (concurrent first logins can't insert duplicates)
+            profile = self.user_profiles.find_one_and_update(
+                {'username': username},
+                {'$setOnInsert': {
                     'systemInfo': {},
                     'preferences': {
                         'communicationStyle': 'detailed',
@@ -88,126 +318,195 @@ class ITSupportAgent:
                     },
                     'commonIssues': [],
                     'notes': ''
-                }
-                self.user_profiles.insert_one(profile)
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
 
-            return {
+            user_profile = {
                 'systemInfo': profile.get('systemInfo', {}),
                 'preferences': profile.get('preferences', {}),
                 'commonIssues': profile.get('commonIssues', []),
                 'notes': profile.get('notes', ''),
                 'source': 'user_profile'
             }
+            if self.profile_cache is not None:
+                self.profile_cache.put(username, user_profile)
+            return user_profile
         except Exception as e:
             print(f"User profile error: {e}")
             return {'source': 'user_profile', 'error': str(e)}
 
     def build_context(self, username, user_message):
         """Build context from all 3 knowledge bases"""
+        user_profile = self._executor.submit(self.get_user_profile, username)
+        # Embed the message once for both knowledge base searches
+        embedding = self._search_embedding(user_message)
+        base_knowledge = self._executor.submit(self.search_base_knowledge, user_message, query_embedding=embedding)
+        completed_issues = self._executor.submit(self.search_completed_issues, user_message, query_embedding=embedding)
         context = {
-            'base_knowledge': self.search_base_knowledge(user_message),
-            'completed_issues': self.search_completed_issues(user_message),
-            'user_profile': self.get_user_profile(username)
+            'base_knowledge': base_knowledge.result(),
+            'completed_issues': completed_issues.result(),
+            'user_profile': user_profile.result()
         }
         return context
 
-    def format_context_for_llm(self, context):
-        """Format context into a prompt for the LLM"""
-        prompt_parts = []
-
-        # Add base knowledge
-        if context['base_knowledge']:
-            prompt_parts.append("📋 COMPANY POLICIES & PROCEDURES:")
-            for item in context['base_knowledge']:
-                prompt_parts.append(f"- {item['title']} ({item['category']}): {item['content'][:200]}...")
-
-        # Add completed issues
-        if context['completed_issues']:
-            prompt_parts.append("\n🔧 SIMILAR PAST ISSUES & SOLUTIONS:")
-            for item in context['completed_issues']:
-                prompt_parts.append(f"- Issue: {item['title']}")
-                prompt_parts.append(f"  Solution: {item['solution'][:200]}...")
+    def _context_packs(self, context):
+        """
+        Context as prompt sections, ordered from least to most likely to change between turns
+        Hits are sorted by title rather than search rank, so the same hits always
+        produce the same text and Ollama can reuse its cached prompt prefix
+        """
+        packs = []
 
         # Add user profile
         user_profile = context['user_profile']
         if user_profile and 'preferences' in user_profile:
             prefs = user_profile['preferences']
-            prompt_parts.append(f"\n👤 USER PREFERENCES:")
-            prompt_parts.append(f"- Technical Level: {prefs.get('technicalLevel', 'intermediate')}")
-            prompt_parts.append(f"- Communication Style: {prefs.get('communicationStyle', 'detailed')}")
+            lines = [
+                "👤 USER PREFERENCES:",
+                f"- Technical Level: {prefs.get('technicalLevel', 'intermediate')}",
+                f"- Communication Style: {prefs.get('communicationStyle', 'detailed')}"
+            ]
 
             if user_profile.get('systemInfo'):
                 sys_info = user_profile['systemInfo']
                 if sys_info.get('os'):
-                    prompt_parts.append(f"- OS: {sys_info['os']}")
+                    lines.append(f"- OS: {sys_info['os']}")
                 if sys_info.get('software'):
-                    prompt_parts.append(f"- Software: {', '.join(sys_info['software'][:3])}")
+                    lines.append(f"- Software: {', '.join(sys_info['software'][:3])}")
+            packs.append("\n".join(lines))
 
-        return "\n".join(prompt_parts)
+        # Add base knowledge
+        if context['base_knowledge']:
+            packs.append("📋 COMPANY POLICIES & PROCEDURES:\n" + "\n".join(
+                f"- {item['title']} ({item['category']}): {item['content']}..."
+                for item in sorted(context['base_knowledge'], key=itemgetter('title'))
+            ))
 
-    def chat(self, username, user_message, conversation_history=[]):
-        """Main chat method with 3-tier KB integration"""
+        # Add completed issues
+        if context['completed_issues']:
+            packs.append("🔧 SIMILAR PAST ISSUES & SOLUTIONS:\n" + "\n".join(
+                f"- Issue: {item['title']}\n  Solution: {item['solution']}..."
+                for item in sorted(context['completed_issues'], key=itemgetter('title'))
+            ))
 
-        # Build context from all knowledge bases
-        context = self.build_context(username, user_message)
-        context_prompt = self.format_context_for_llm(context)
+        return packs
 
-        # Build system prompt
-        system_prompt = f"""You are a helpful IT support agent. Use the following information to assist the user:
+    def format_context_for_llm(self, context):
+        """Format context into a prompt for the LLM"""
+        return "\n\n".join(self._context_packs(context))
 
-{context_prompt}
+    async def abuild_context(self, username, user_message):
+        """Async build_context - the three lookups run concurrently in worker threads"""
+        user_profile = asyncio.create_task(asyncio.to_thread(self.get_user_profile, username))
+        # Embed the message once for both knowledge base searches
+        embedding = await asyncio.to_thread(self._search_embedding, user_message) if self.vector_index else None
+        base_knowledge, completed_issues, user_profile = await asyncio.gather(
+            asyncio.to_thread(self.search_base_knowledge, user_message, query_embedding=embedding),
+            asyncio.to_thread(self.search_completed_issues, user_message, query_embedding=embedding),
+            user_profile,
+        )
+        return {
+            'base_knowledge': base_knowledge,
+            'completed_issues': completed_issues,
+            'user_profile': user_profile
+        }
 
-Instructions:
-- Provide clear, actionable IT support
-- Reference company policies when relevant
-- Suggest solutions from past resolved issues
-- Adapt your communication style to the user's technical level
-- Be concise but thorough
-- If you don't have enough information, ask clarifying questions"""
+    def _build_messages(self, context, user_message, conversation_history):
+        """Build the Ollama message list from the KB context and recent conversation"""
+        # Build system prompt - the fixed instructions come first and the context
+        # after them, so consecutive turns share the longest possible prompt prefix
+        system_prompt = "\n\n".join([SYSTEM_INSTRUCTIONS, *self._context_packs(context)])
 
         # Build messages for Ollama
         messages = [
             {"role": "system", "content": system_prompt}
         ]
 
-        # Add conversation history (last 5 messages)
-        for msg in conversation_history[-5:]:
-            messages.append(msg)
+        # Add as much recent conversation history as fits the token budget
+        messages.extend(self._trim_history(conversation_history, HISTORY_TOKEN_BUDGET))
 
         # Add current user message
         messages.append({"role": "user", "content": user_message})
+        return messages
+
+    @staticmethod
+    def _trim_history(conversation_history, max_tokens):
+        """Most recent messages whose combined estimated size fits within max_tokens, oldest first"""
+        kept = []
+        remaining = max_tokens
+        for msg in reversed(list(conversation_history or ())):
+            remaining -= estimate_tokens(msg.get('content') or '')
+            if remaining < 0:
+                break
+            kept.append(msg)
+        kept.reverse()
+        return kept
+
+    def _call_ollama(self, messages):
+        """Send messages to Ollama and return the reply text"""
+        response = post_ollama_chat(self.session, self.ollama_url,
+                                    {"model": "mistral", "messages": messages}, timeout=180)
+        result = response.json()
+        return result['message']['content']
+
+    def _stream_ollama(self, messages):
+        """Send messages to Ollama with streaming on, yielding reply text as it is generated"""
+        yield from iter_ollama_content(post_ollama_chat(
+            self.session, self.ollama_url, {"model": "mistral", "messages": messages}, timeout=180, stream=True
+        ))
+
+    def _chat_result(self, context, bot_response):
+        """Build the chat result for a reply"""
+        return {
+            'response': bot_response,
+            'context_used': {
+                'base_knowledge_count': len(context['base_knowledge']),
+                'completed_issues_count': len(context['completed_issues']),
+                'user_profile_loaded': bool(context['user_profile'])
+            }
+        }
+
+    def chat(self, username, user_message, conversation_history=[]):
+        """Main chat method with 3-tier KB integration"""
+
+        # Build context from all knowledge bases
+        context = self.build_context(username, user_message)
+        messages = self._build_messages(context, user_message, conversation_history)
 
         # Call Ollama API
         try:
-            response = requests.post(
-                f"{self.ollama_url}/api/chat",
-                json={
-                    "model": "mistral",
-                    "messages": messages,
-                    "stream": False
-                },
-                timeout=180
-            )
-            response.raise_for_status()
-            result = response.json()
+            return self._chat_result(context, self._call_ollama(messages))
+        except Exception as e:
+            return ollama_chat_error(e)
 
-            bot_response = result['message']['content']
+    async def achat(self, username, user_message, conversation_history=[]):
+        """
+        Async variant of chat() for callers running on an event loop
+        The lookups overlap, and the blocking Mongo/Ollama calls run in worker threads
+        """
+        context = await self.abuild_context(username, user_message)
+        messages = self._build_messages(context, user_message, conversation_history)
 
-            return {
-                'response': bot_response,
-                'context_used': {
-                    'base_knowledge_count': len(context['base_knowledge']),
-                    'completed_issues_count': len(context['completed_issues']),
-                    'user_profile_loaded': bool(context['user_profile'])
-                }
-            }
+        try:
+            return self._chat_result(context, await asyncio.to_thread(self._call_ollama, messages))
+        except Exception as e:
+            return ollama_chat_error(e)
+
+    def stream_chat(self, username, user_message, conversation_history=[]):
+        """
+        Streaming variant of chat() - yields reply text as Ollama generates it
+        Closing the generator early stops generation
+        If Ollama fails, the last chunk is STREAM_ERROR_MARKER plus the error
+        """
+        context = self.build_context(username, user_message)
+        messages = self._build_messages(context, user_message, conversation_history)
 
+        try:
+            yield from self._stream_ollama(messages)
         except Exception as e:
-            print(f"Ollama API error: {e}")
-            return {
-                'response': f"I'm having trouble connecting to my AI engine. Error: {str(e)}",
-                'error': str(e)
-            }
+            yield STREAM_ERROR_MARKER + ollama_chat_error(e)['response']
 
     def store_completed_issue(self, username, issue_title, issue_description, solution, category='other'):
         """Store a resolved issue in the completed issues KB"""
@@ -222,17 +521,32 @@ Instructions:
                 'symptoms': [],
                 'tags': []
             }
+            if self.vector_index:
+                embeddings = self._embed([_issue_text(issue)])
+                if embeddings:
+                    issue['embedding'] = embeddings[0]
             self.completed_issues.insert_one(issue)
+            # The new issue should show up in searches straight away
+            if self.search_cache is not None:
+                self.search_cache.clear()
             return True
         except Exception as e:
             print(f"Error storing completed issue: {e}")
             return False
 
 # Singleton instance
-_agent_instance = None
+_agent_instances = {}
+_agent_lock = threading.Lock()
 
 def get_agent(mongo_uri):
-    global _agent_instance
-    if _agent_instance is None:
-        _agent_instance = ITSupportAgent(mongo_uri)
-    return _agent_instance
+    """Get or create the agent for a Mongo URI"""
+    agent = _agent_instances.get(mongo_uri)
+    if agent is None:
+        # Concurrent first requests must not each build an agent (and its Mongo client)
+        with _agent_lock:
+            agent = _agent_instances.get(mongo_uri)
+            if agent is None:
+                agent = ITSupportAgent(mongo_uri)
+                atexit.register(agent.close)
+                _agent_instances[mongo_uri] = agent
+    return agent
@@ -38,8 +38,9 @@ def seed_base_knowledge(agent):
     ]
 
     count = 0
-    for key, content in base_kb:
-        if agent.add_base_knowledge(key, content):
+    results = agent.add_base_knowledge_bulk(base_kb)
+    for (key, _), success in zip(base_kb, results):
+        if success:
             count += 1
             print(f"  ✓ Added: {key}")
         else:
@@ -65,8 +66,9 @@ def seed_completed_issues(agent):
     ]
 
     count = 0
-    for issue_id, content in completed:
-        if agent.add_completed_issue(issue_id, content):
+    results = agent.add_completed_issues_bulk(completed)
+    for (issue_id, _), success in zip(completed, results):
+        if success:
             count += 1
             print(f"  ✓ Added: {issue_id}")
         else:
@@ -90,8 +92,9 @@ def seed_user_specific(agent, username="demo"):
     ]
 
     count = 0
-    for key, content in user_kb:
-        if agent.add_user_knowledge(username, key, content):
+    results = agent.add_user_knowledge_bulk(username, user_kb)
+    for (key, _), success in zip(user_kb, results):
+        if success:
             count += 1
             print(f"  ✓ Added: {key}")
         else:
@@ -6,6 +6,7 @@ Provides REST API for conversations with persistent memory
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, List
 import sys
@@ -377,7 +378,7 @@ async def mongo_chat(request: MongoChatRequest):
         mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/it-support-agent")
         agent = get_mongo_agent(mongo_uri)
 
-        result = agent.chat(
+        result = await agent.achat(
             username=request.username,
             user_message=request.message,
             conversation_history=request.conversation_history or []
@@ -392,6 +393,30 @@ async def mongo_chat(request: MongoChatRequest):
         logger.error(f"MongoDB chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/mongo-chat/stream")
+async def mongo_chat_stream(request: MongoChatRequest):
+    """
+    Streaming /mongo-chat - the reply is sent as plain text while it is generated
+    Disconnecting stops generation
+    The status is always 200 once streaming starts: if generation fails, the stream ends
+    with a line starting "[STREAM_ERROR] " followed by the error, and the text before it
+    is an incomplete reply
+    """
+    if get_mongo_agent is None:
+        raise HTTPException(status_code=500, detail="MongoDB agent not available")
+
+    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/it-support-agent")
+    agent = get_mongo_agent(mongo_uri)
+
+    return StreamingResponse(
+        agent.stream_chat(
+            username=request.username,
+            user_message=request.message,
+            conversation_history=request.conversation_history or []
+        ),
+        media_type="text/plain"
+    )
+
 # Hippocampus-integrated chat endpoint (NEW - correct architecture)
 @app.post("/hippo-chat", response_model=HippoChatResponse)
 async def hippo_chat(request: HippoChatRequest):
@@ -406,7 +431,7 @@ async def hippo_chat(request: HippoChatRequest):
         # Get agent with Hippocampus client and Ollama URL
         agent = get_hippo_agent(hippo_client=hippocampus_client, ollama_url=ollama_url)
 
-        result = agent.chat(
+        result = await agent.achat(
             username=request.username,
             user_message=request.message,
             conversation_history=request.conversation_history or []
@@ -421,6 +446,29 @@ async def hippo_chat(request: HippoChatRequest):
         logger.error(f"Hippocampus chat error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/hippo-chat/stream")
+async def hippo_chat_stream(request: HippoChatRequest):
+    """
+    Streaming /hippo-chat - the reply is sent as plain text while it is generated
+    Disconnecting stops generation
+    The status is always 200 once streaming starts: if generation fails, the stream ends
+    with a line starting "[STREAM_ERROR] " followed by the error, and the text before it
+    is an incomplete reply
+    """
+    if get_hippo_agent is None or hippocampus_client is None:
+        raise HTTPException(status_code=500, detail="Hippocampus agent not available")
+
+    agent = get_hippo_agent(hippo_client=hippocampus_client, ollama_url=ollama_url)
+
+    return StreamingResponse(
+        agent.stream_chat(
+            username=request.username,
+            user_message=request.message,
+            conversation_history=request.conversation_history or []
+        ),
+        media_type="text/plain"
+    )
+
 # Curator endpoints - Base knowledge management
 @app.post("/curator/add", response_model=CuratorAddResponse)
 async def curator_add_knowledge(request: CuratorAddRequest):